@@ -29,19 +29,61 @@ import time
 import threading
 import json
 import signal
-import requests
+import socket
+import tempfile
 from threading import Thread
-from datetime import datetime, timedelta
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+import datetime
 
 gi.require_version('Gtk', '3.0')
 gi.require_version('AppIndicator3', '0.1')
-from gi.repository import Gtk, GLib, AppIndicator3
+gi.require_version('Pango', '1.0')
+from gi.repository import Gtk, GLib, Pango, AppIndicator3
+
+# HTTP timeout in seconds (applies to connecting and to each read)
+REQUEST_TIMEOUT = 10
+USER_AGENT = "unity-weather-monitor/1.0"
+
+# First retry delay after a failed update, doubled up to the update interval
+RETRY_DELAY = 60  # Seconds
+
+# On-disk cache for values that rarely change between runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "unity-weather-monitor")
+LOCATION_CACHE_FILE = os.path.join(CACHE_DIR, "location.json")
+WEATHER_CACHE_FILE = os.path.join(CACHE_DIR, "forecast.json")
+LOCATION_CACHE_TTL = 24 * 60 * 60  # Seconds
+WEATHER_CACHE_TTL = 10 * 60  # Seconds
+
+# Icon and description shown for unrecognized condition codes
+UNKNOWN_CONDITION = ("❓", "Unknown")
+
+# English day and month abbreviations for forecast dates
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Label templates for the indicator and the weather menu items
+INDICATOR_FMT = "%s %.1f%s"
+CURRENT_FMT = "Current: %s %s, %.1f%s"
+FORECAST_FMT = "%s: %s %s, %.1f%s / %.1f%s"
+
+# Monospace attributes shared by all menu labels. Pango attributes can only be
+# created from Python on Pango 1.44+; older versions fall back to markup.
+MONOSPACE_ATTRS = None
+if hasattr(Pango, "attr_family_new"):
+    MONOSPACE_ATTRS = Pango.AttrList()
+    MONOSPACE_ATTRS.insert(Pango.attr_family_new("monospace"))
 
 class UnityWeatherMonitor:
     def __init__(self):
         # Initialize running state
         self.running = True
         
+        # Set to wake the update thread early (quit or interval change)
+        self._wake = threading.Event()
+        
         # Get the path to the icon file
         script_dir = os.path.dirname(os.path.abspath(__file__))
         icon_path = os.path.join(script_dir, "weather-icon.png")
@@ -61,12 +103,14 @@ class UnityWeatherMonitor:
         self.longitude = -122.3321
         self.location_name = "Default Location"
         self.zipcode = None  # Store the configured zipcode
+        self._last_location_ts = 0  # When the location was last resolved
         
         # Temperature unit (imperial/celsius)
         self.use_imperial = True  # Default to imperial (Fahrenheit)
         
         # Weather data
         self.current_temp = None
+        self.current_temp_f = None
         self.current_condition = None
         self.forecast = []
         
@@ -134,6 +178,11 @@ class UnityWeatherMonitor:
             99: "Thunderstorm with heavy hail"
         }
         
+        # Condition code -> (icon, description) table indexed directly by code
+        self._wx_table = [UNKNOWN_CONDITION] * 100
+        for code, icon in self.weather_icons.items():
+            self._wx_table[code] = (icon, self.weather_descriptions[code])
+        
         # Create a menu
         self.menu = Gtk.Menu()
         
@@ -155,15 +204,16 @@ class UnityWeatherMonitor:
         # Separator after current weather
         self.menu.append(Gtk.SeparatorMenuItem())
         
-        # 15-day forecast items
+        # Forecast items, each preceded by a blank spacer that is only shown
+        # where the forecast starts or ends a weekend. They are created on the
+        # first data load (see build_forecast_items) so the indicator shows up sooner.
         self.forecast_items = []
+        self.forecast_spacers = []
         
-        # Create the forecast items
-        for i in range(15):
-            item = self.create_monospace_menu_item(f"Day {i+1}: Loading...")
-            item.set_sensitive(False)
-            self.forecast_items.append(item)
-            self.menu.append(item)
+        # Spacer closing a weekend at the end of the forecast
+        spacer = self.create_spacer_menu_item()
+        self.forecast_spacers.append(spacer)
+        self.menu.append(spacer)
         
         # Separator before preferences
         self.menu.append(Gtk.SeparatorMenuItem())
@@ -236,29 +286,62 @@ class UnityWeatherMonitor:
         # Initialize update interval in minutes
         self.update_interval = 15
         
-        # Start the update thread
-        self.update_thread = Thread(target=self.update_weather_loop)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Start the update thread (daemon, so it never blocks exit)
+        Thread(target=self.update_weather_loop, daemon=True).start()
     
     def create_monospace_menu_item(self, text):
         """Create a menu item with monospace font"""
         item = Gtk.MenuItem()
         label = Gtk.Label()
-        label.set_markup(f'<span font_family="monospace">{text}</span>')
+        # Style with attributes once so updates can skip markup parsing
+        if MONOSPACE_ATTRS is not None:
+            label.set_attributes(MONOSPACE_ATTRS)
+        self.set_monospace_text(label, text)
         label.set_xalign(0.0)  # Left-align text
         item.add(label)
         return item
     
+    def create_spacer_menu_item(self):
+        """Create a blank menu item that stays hidden until shown explicitly"""
+        item = self.create_monospace_menu_item("")
+        item.set_sensitive(False)
+        item.get_child().show()  # Keep the blank line height when shown
+        item.set_no_show_all(True)
+        return item
+    
+    def build_forecast_items(self, count):
+        """Create menu items for forecast days that don't have one yet"""
+        # New days go just before the spacer closing the forecast
+        position = self.menu.get_children().index(self.forecast_spacers[-1])
+        for i in range(len(self.forecast_items), count):
+            spacer = self.create_spacer_menu_item()
+            self.forecast_spacers.insert(i, spacer)
+            self.menu.insert(spacer, position)
+            
+            item = self.create_monospace_menu_item("")
+            item.set_sensitive(False)
+            item.get_child().show()
+            self.forecast_items.append(item)
+            self.menu.insert(item, position + 1)
+            position += 2
+    
+    def set_monospace_text(self, label, text):
+        """Set the text of a monospace label"""
+        if MONOSPACE_ATTRS is not None:
+            label.set_text(text)
+        else:
+            label.set_markup(f'<span font_family="monospace">{GLib.markup_escape_text(text)}</span>')
+    
     def update_monospace_menu_item(self, item, text):
         """Update the label of a monospace menu item"""
-        label = item.get_child()
-        label.set_markup(f'<span font_family="monospace">{text}</span>')
+        self.set_monospace_text(item.get_child(), text)
     
     def on_interval_toggled(self, widget, interval):
         """Handle radio menu item toggled signal for update interval"""
         if widget.get_active():
             self.update_interval = interval
+            # Wake the update thread so it recomputes its delay with the new interval
+            self._wake.set()
     
     def on_unit_toggled(self, widget, use_imperial):
         """Handle radio menu item toggled signal for temperature unit"""
@@ -267,10 +350,19 @@ class UnityWeatherMonitor:
             # Update the display immediately
             GLib.idle_add(self.update_weather_ui)
     
-    def celsius_to_fahrenheit(self, celsius):
+    @staticmethod
+    def celsius_to_fahrenheit(celsius):
         """Convert Celsius to Fahrenheit"""
         return (celsius * 9/5) + 32
     
+    def _http_get_json(self, url, params=None):
+        """Fetch a URL and decode its JSON response"""
+        if params:
+            url = f"{url}?{urlencode(params, doseq=True)}"
+        request = Request(url, headers={"User-Agent": USER_AGENT})
+        with urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return json.load(response)
+    
     def get_location_from_zipcode(self, zipcode):
         """Get location coordinates based on zipcode"""
         try:
@@ -282,12 +374,7 @@ class UnityWeatherMonitor:
                 "limit": 1
             }
             
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                print(f"Failed to get location data: {response.status_code}")
-                return False
-                
-            data = response.json()
+            data = self._http_get_json(url, params)
             if not data:
                 print(f"No location found for zipcode: {zipcode}")
                 return False
@@ -308,27 +395,66 @@ class UnityWeatherMonitor:
                 
             self.location_name = ", ".join(location_parts) if location_parts else f"Zipcode {zipcode}"
             self.zipcode = zipcode
+            self._last_location_ts = time.time()
             
             print(f"Location set: {self.location_name} ({self.latitude}, {self.longitude})")
             return True
+        except HTTPError as e:
+            print(f"Failed to get location data: {e.code}")
+            return False
+        except (URLError, socket.timeout) as e:
+            print(f"Network error getting location from zipcode: {e}")
+            return False
         except Exception as e:
             print(f"Error getting location from zipcode: {e}")
             return False
     
+    def _write_cache_file(self, path, data):
+        """Atomically write JSON data to a cache file"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Error writing cache file {path}: {e}")
+    
+    def _load_location_cache(self):
+        """Load a recent IP-based location from the disk cache"""
+        try:
+            with open(LOCATION_CACHE_FILE) as f:
+                cached = json.load(f)
+            if time.time() - cached["ts"] >= LOCATION_CACHE_TTL:
+                return False
+            
+            self.latitude = float(cached["lat"])
+            self.longitude = float(cached["lon"])
+            self.location_name = cached["name"]
+            self._last_location_ts = cached["ts"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        
+        print(f"Location loaded from cache: {self.location_name} ({self.latitude}, {self.longitude})")
+        return True
+    
     def get_location_from_ip(self):
         """Get location coordinates based on IP address"""
         # Skip IP-based location if zipcode is configured
         if self.zipcode:
             return False
+        
+        # Reuse the cached location if we looked it up recently
+        if self._load_location_cache():
+            return True
             
         try:
             # Use ipinfo.io to get location from IP (free tier)
-            response = requests.get("https://ipinfo.io/json")
-            if response.status_code != 200:
-                print(f"Failed to get location data: {response.status_code}")
-                return False
-                
-            data = response.json()
+            data = self._http_get_json("https://ipinfo.io/json")
             if "loc" not in data:
                 print("Location data not found in response")
                 return False
@@ -352,241 +478,262 @@ class UnityWeatherMonitor:
                 location_parts.append(data["country"])
                 
             self.location_name = ", ".join(location_parts) if location_parts else "Unknown Location"
+            self._last_location_ts = time.time()
+            
+            self._write_cache_file(LOCATION_CACHE_FILE, {
+                "lat": self.latitude,
+                "lon": self.longitude,
+                "name": self.location_name,
+                "ts": self._last_location_ts
+            })
             
             print(f"Location detected: {self.location_name} ({self.latitude}, {self.longitude})")
             return True
+        except HTTPError as e:
+            print(f"Failed to get location data: {e.code}")
+            return False
+        except (URLError, socket.timeout) as e:
+            print(f"Network error getting location: {e}")
+            return False
         except Exception as e:
             print(f"Error getting location: {e}")
             return False
     
-    def get_weather_data(self):
+    def _location_stale(self):
+        """Check whether the location needs to be resolved again"""
+        return time.time() - self._last_location_ts > LOCATION_CACHE_TTL
+    
+    def update_location(self):
+        """Resolve the location if it is unknown or stale"""
+        if self.location_name != "Default Location" and not self._location_stale():
+            return
+        
+        # Try IP-based location first
+        if not self.get_location_from_ip():
+            # If IP location fails and we have a zipcode, try that
+            if self.zipcode:
+                self.get_location_from_zipcode(self.zipcode)
+    
+    def _weather_cache_key(self):
+        """Get the cache key for the current location's forecast"""
+        return f"{self.latitude:.3f},{self.longitude:.3f}"
+    
+    def _load_weather_cache(self, key):
+        """Load a recent forecast for this location from the disk cache"""
+        try:
+            with open(WEATHER_CACHE_FILE) as f:
+                cached = json.load(f)
+            if cached["key"] != key or time.time() - cached["ts"] >= WEATHER_CACHE_TTL:
+                return None
+            return cached["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def get_weather_data(self, use_cache=True):
         """Fetch weather data from Open-Meteo API"""
+        # Reuse the cached forecast if it was fetched recently
+        cache_key = self._weather_cache_key()
+        if use_cache:
+            data = self._load_weather_cache(cache_key)
+            if data and "current_weather" in data:
+                return data
+        
         try:
             url = f"https://api.open-meteo.com/v1/forecast"
             params = {
                 "latitude": self.latitude,
                 "longitude": self.longitude,
-                "current": ["temperature_2m", "weather_code"],
+                "current_weather": "true",
                 "daily": ["weather_code", "temperature_2m_max", "temperature_2m_min"],
                 "timezone": "auto",
                 "forecast_days": 15
             }
             
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"API error: {response.status_code}")
-                return None
+            data = self._http_get_json(url, params)
+            self._write_cache_file(WEATHER_CACHE_FILE, {
+                "key": cache_key,
+                "ts": time.time(),
+                "data": data
+            })
+            return data
+        except HTTPError as e:
+            print(f"API error: {e.code}")
+            return None
+        except (URLError, socket.timeout) as e:
+            print(f"Network error fetching weather data: {e}")
+            return None
         except Exception as e:
             print(f"Error fetching weather data: {e}")
             return None
     
-    def update_weather_data(self):
+    def parse_forecast_day(self, date, condition, max_temp, min_temp):
+        """Build a forecast entry for one day of the API response"""
+        # Format the date and convert once here so redraws only pick a field
+        year, month, day = map(int, date.split("-"))
+        weekday = datetime.date(year, month, day).weekday()  # 0-6, where 5 is Saturday and 6 is Sunday
+        return {
+            "date": date,
+            "date_str": f"{WEEKDAY_NAMES[weekday]}, {MONTH_NAMES[month - 1]} {day:02d}",
+            "weekday": weekday,
+            "condition": condition,
+            "max_temp": max_temp,
+            "min_temp": min_temp,
+            "max_temp_f": self.celsius_to_fahrenheit(max_temp),
+            "min_temp_f": self.celsius_to_fahrenheit(min_temp)
+        }
+    
+    def update_weather_data(self, use_cache=True):
         """Update weather data from API"""
-        data = self.get_weather_data()
+        data = self.get_weather_data(use_cache)
         if not data:
             return False
         
         try:
-            # Update current weather
-            self.current_temp = data["current"]["temperature_2m"]
-            self.current_condition = data["current"]["weather_code"]
-            
-            # Update location item
-            GLib.idle_add(self.update_location_item)
+            # Update current weather, computing both units before publishing either
+            current_temp = data["current_weather"]["temperature"]
+            self.current_temp_f = self.celsius_to_fahrenheit(current_temp)
+            self.current_temp = current_temp
+            self.current_condition = data["current_weather"]["weathercode"]
             
             # Update forecast
-            self.forecast = []
-            for i in range(len(data["daily"]["time"])):
-                date = data["daily"]["time"][i]
-                condition = data["daily"]["weather_code"][i]
-                max_temp = data["daily"]["temperature_2m_max"][i]
-                min_temp = data["daily"]["temperature_2m_min"][i]
-                
-                self.forecast.append({
-                    "date": date,
-                    "condition": condition,
-                    "max_temp": max_temp,
-                    "min_temp": min_temp
-                })
+            daily = data["daily"]
+            self.forecast = [
+                self.parse_forecast_day(date, condition, max_temp, min_temp)
+                for date, condition, max_temp, min_temp in zip(
+                    daily["time"],
+                    daily["weather_code"],
+                    daily["temperature_2m_max"],
+                    daily["temperature_2m_min"]
+                )
+            ]
             
             return True
         except Exception as e:
             print(f"Error parsing weather data: {e}")
             return False
     
-    def get_condition_icon(self, condition_code):
-        """Get the Unicode icon for a weather condition code"""
-        return self.weather_icons.get(condition_code, "❓")
-    
-    def get_condition_description(self, condition_code):
-        """Get the text description for a weather condition code"""
-        return self.weather_descriptions.get(condition_code, "Unknown")
-    
-    def update_location_item(self):
-        """Update the location menu item"""
-        self.update_monospace_menu_item(
-            self.location_item,
-            f"Location: {self.location_name}"
-        )
-        return False  # Required for GLib.idle_add
+    def get_condition(self, condition_code):
+        """Get the Unicode icon and text description for a weather condition code"""
+        # Accept whole-number floats like the old dict lookup did
+        if isinstance(condition_code, float) and condition_code.is_integer():
+            condition_code = int(condition_code)
+        if type(condition_code) is int and 0 <= condition_code < 100:
+            return self._wx_table[condition_code]
+        return UNKNOWN_CONDITION
     
     def update_weather_ui(self):
         """Update the weather UI elements"""
-        if self.current_temp is None or self.current_condition is None:
+        if (self.current_temp is None or self.current_temp_f is None
+                or self.current_condition is None):
             return False
         
-        # Get condition icon
-        icon = self.get_condition_icon(self.current_condition)
+        # Update location item
+        self.update_monospace_menu_item(self.location_item, f"Location: {self.location_name}")
         
-        # Convert temperature if needed
+        # Get condition icon and description
+        icon, condition_desc = self.get_condition(self.current_condition)
+        
+        # Pick the temperature in the selected unit
         display_temp = self.current_temp
         unit = "°C"
         if self.use_imperial:
-            display_temp = self.celsius_to_fahrenheit(self.current_temp)
+            display_temp = self.current_temp_f
             unit = "°F"
         
         # Update indicator label
-        label_text = f"{icon} {display_temp:.1f}{unit}"
+        label_text = INDICATOR_FMT % (icon, display_temp, unit)
         self.indicator.set_label(label_text, "")
         
-        # Get condition description
-        condition_desc = self.get_condition_description(self.current_condition)
-        
         # Update current weather menu item
         self.update_monospace_menu_item(
             self.current_item, 
-            f"Current: {icon} {condition_desc}, {display_temp:.1f}{unit}"
+            CURRENT_FMT % (icon, condition_desc, display_temp, unit)
         )
         
-        # Temporarily store all items we need to remove
-        items_to_remove = []
-        
-        # Remove forecast items and any weekend separators
-        for item in self.menu.get_children():
-            # Skip the first few items (location, current, first separator)
-            # and the last few items (preferences separator and below)
-            if item in [self.location_item, self.current_item]:
-                continue
-                
-            # Check if this is a menu item that's part of the forecast or a weekend separator
-            if isinstance(item, Gtk.MenuItem) and not isinstance(item, Gtk.SeparatorMenuItem):
-                label = item.get_child()
-                if label and hasattr(label, 'get_text'):
-                    text = label.get_text()
-                    # Match any date format or day indicator
-                    if text and (text.startswith("Mon") or
-                               text.startswith("Tue") or
-                               text.startswith("Wed") or
-                               text.startswith("Thu") or
-                               text.startswith("Fri") or
-                               text.startswith("Sat") or
-                               text.startswith("Sun") or
-                               text.startswith("Day")):
-                        items_to_remove.append(item)
-        
-        # Remove the items outside the loop
-        for item in items_to_remove:
-            self.menu.remove(item)
-        
-        # List to store all items we'll add
-        new_items = []
+        # Create widgets the first time we have data (or if more days arrive)
+        days = self.forecast
+        if len(days) > len(self.forecast_items):
+            self.build_forecast_items(len(days))
         last_was_weekend = False
         
-        # Create forecast items with weekend separators
-        for i, day_data in enumerate(self.forecast):
-            date_obj = datetime.fromisoformat(day_data["date"])
-            date_str = date_obj.strftime("%a, %b %d")
-            weekday = date_obj.weekday()  # 0-6, where 5 is Saturday and 6 is Sunday
-            is_weekend = weekday >= 5
+        # Update forecast items in place with weekend spacers
+        for i, day_data in enumerate(days):
+            date_str = day_data["date_str"]
+            is_weekend = day_data["weekday"] >= 5
             
-            # Handle weekend transitions
-            if is_weekend and not last_was_weekend:
-                # Starting a weekend - add separator before
-                separator = self.create_monospace_menu_item("")
-                separator.set_sensitive(False)
-                new_items.append(separator)
-            elif not is_weekend and last_was_weekend:
-                # Ending a weekend - add separator after
-                separator = self.create_monospace_menu_item("")
-                separator.set_sensitive(False)
-                new_items.append(separator)
+            # Show the spacer before this day when starting or ending a weekend
+            self.forecast_spacers[i].set_visible(is_weekend != last_was_weekend)
             
             # Update forecast item
-            condition_icon = self.get_condition_icon(day_data["condition"])
-            max_temp = day_data["max_temp"]
-            min_temp = day_data["min_temp"]
-            
-            # Convert temperatures if needed
+            condition_icon, condition_desc = self.get_condition(day_data["condition"])
+            # Pick temperatures in the selected unit
             if self.use_imperial:
-                max_temp = self.celsius_to_fahrenheit(max_temp)
-                min_temp = self.celsius_to_fahrenheit(min_temp)
-            
-            # Get condition description
-            condition_desc = self.get_condition_description(day_data["condition"])
+                max_temp = day_data["max_temp_f"]
+                min_temp = day_data["min_temp_f"]
+            else:
+                max_temp = day_data["max_temp"]
+                min_temp = day_data["min_temp"]
             
-            # Create forecast item
-            forecast_item = self.create_monospace_menu_item(
-                f"{date_str}: {condition_icon} {condition_desc}, {max_temp:.1f}{unit} / {min_temp:.1f}{unit}"
+            self.update_monospace_menu_item(
+                self.forecast_items[i],
+                FORECAST_FMT % (date_str, condition_icon, condition_desc, max_temp, unit, min_temp, unit)
             )
-            forecast_item.set_sensitive(False)
-            new_items.append(forecast_item)
+            self.forecast_items[i].show()
             
             # Update for next iteration
             last_was_weekend = is_weekend
         
-        # If the last day was a weekend, add closing separator
-        if last_was_weekend:
-            separator = self.create_monospace_menu_item("")
-            separator.set_sensitive(False)
-            new_items.append(separator)
-        
-        # Find the position to insert items - after the first separator
-        insert_position = 3  # After location, current weather, and the first separator
+        # Hide items and spacers the current forecast doesn't use
+        for i in range(len(days), len(self.forecast_items)):
+            self.forecast_items[i].hide()
+        for i in range(len(days) + 1, len(self.forecast_spacers)):
+            self.forecast_spacers[i].hide()
         
-        # Insert all the new items
-        for item in new_items:
-            self.menu.insert(item, insert_position)
-            insert_position += 1
-        
-        # Make sure all items are visible
-        self.menu.show_all()
+        # If the last day was a weekend, show the closing spacer after it
+        self.forecast_spacers[len(days)].set_visible(last_was_weekend)
         
         return False  # Required for GLib.idle_add
     
     def update_weather_loop(self):
         """Background thread to update weather data"""
-        # First try to get location from IP
-        if not self.get_location_from_ip():
-            # If IP location fails and we have a zipcode, try that
-            if self.zipcode:
-                self.get_location_from_zipcode(self.zipcode)
-        
+        retry_delay = None  # Set while updates are failing
         while self.running:
+            # Only re-geolocate when the location is unknown or stale
+            self.update_location()
+            
             if self.update_weather_data():
                 GLib.idle_add(self.update_weather_ui)
+                retry_delay = None
+            else:
+                # Retry sooner with exponential backoff, capped at the interval
+                if retry_delay is None:
+                    retry_delay = RETRY_DELAY
+                else:
+                    retry_delay = min(retry_delay * 2, self.update_interval * 60)
             
-            # Sleep for the specified interval (in minutes)
-            for _ in range(self.update_interval * 60):
-                if not self.running:
+            # Sleep until the next update is due. quit() and interval changes
+            # wake us early; an interval change only moves the deadline, measured
+            # from the end of this update, without fetching again.
+            started = time.monotonic()
+            while self.running:
+                interval = self.update_interval * 60
+                delay = interval if retry_delay is None else min(retry_delay, interval)
+                if not self._wake.wait(max(0, started + delay - time.monotonic())):
                     break
-                time.sleep(1)
+                self._wake.clear()
     
     def refresh_weather(self, widget=None):
         """Manually refresh weather data"""
-        # Try IP-based location first
-        if not self.get_location_from_ip():
-            # If IP location fails and we have a zipcode, try that
-            if self.zipcode:
-                self.get_location_from_zipcode(self.zipcode)
+        self.update_location()
         
-        if self.update_weather_data():
+        # Skip the disk cache so an explicit refresh always hits the API
+        if self.update_weather_data(use_cache=False):
             GLib.idle_add(self.update_weather_ui)
     
     def quit(self, widget):
         """Handle quit event"""
         self.running = False
+        self._wake.set()
         Gtk.main_quit()
     
     def show_location_dialog(self, widget):